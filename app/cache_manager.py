@@ -1,34 +1,77 @@
+import heapq
+import itertools
 import time
+from collections import OrderedDict
+
+import xxhash
+
+
+def _hash_key(key):
+    # Keys are stored as 64-bit xxh3 digests: cheaper to hash and smaller than long URL strings
+    return xxhash.xxh3_64_intdigest(key.encode())
 
 
 class Cache:
-    def __init__(self, expiry=60):
-        self.cache = {}
+    def __init__(self, expiry=60, max_size=10_000):
+        self.data = OrderedDict()  # hashed key -> (key, value, expiry_time), least recently used first
+        self.heap = []  # min-heap of (expiry_time, seq, hashed key) used to reap expired entries
+        self._seq = itertools.count()  # tie-breaker so equal expiry times never compare keys
         self.expiry = expiry  # Cache expiry time in seconds
+        self.max_size = max_size  # Maximum number of live entries before LRU eviction
 
     def set(self, key, value):
-        # Store the value along with the expiry time
-        self.cache[key] = (value, time.time() + self.expiry)
-
-    def get(self, key):
-        # Retrieve a value if it's not expired
-        if key in self.cache:
-            value, expiry_time = self.cache[key]
-            if time.time() < expiry_time:
-                return value
-            else:
-                # If the entry is expired, delete it and return None
-                del self.cache[key]
+        # Store the value along with the expiry time and mark it as most recently used
+        self._reap()
+        expiry_time = time.time() + self.expiry
+        hashed = _hash_key(key)
+        self.data[hashed] = (key, value, expiry_time)
+        self.data.move_to_end(hashed)
+        heapq.heappush(self.heap, (expiry_time, next(self._seq), hashed))
+        if len(self.data) > self.max_size:
+            # Evict the least recently used entry; its heap record is discarded lazily by _reap
+            self.data.popitem(last=False)
+        if len(self.heap) > 2 * len(self.data):
+            # Most records are stale (refreshed, evicted or deleted keys): rebuild from live entries
+            self.heap = [(expiry, next(self._seq), h) for h, (_, _, expiry) in self.data.items()]
+            heapq.heapify(self.heap)
+
+    def get(self, key, max_age=None):
+        # Retrieve a value if it's not expired and, if max_age is given, was stored at most max_age seconds ago
+        hashed = _hash_key(key)
+        entry = self.data.get(hashed)
+        if entry is None:
+            return None
+        stored_key, value, expiry_time = entry
+        if stored_key != key:
+            # Hash collision with a different key
+            return None
+        now = time.time()
+        if now < expiry_time:
+            if max_age is not None and now - (expiry_time - self.expiry) > max_age:
+                # Too old for this caller, but still valid for others
+                return None
+            self.data.move_to_end(hashed)
+            return value
+        # If the entry is expired, delete it and return None
+        del self.data[hashed]
         return None
 
     def delete(self, key):
         # Delete a cache entry, if it exists
-        if key in self.cache:
-            del self.cache[key]
-
-    def clear_expired(self):
-        # Clear all expired entries from the cache
-        current_time = time.time()
-        keys_to_delete = [key for key, (_, expiry_time) in self.cache.items() if current_time >= expiry_time]
-        for key in keys_to_delete:
-            del self.cache[key]
+        hashed = _hash_key(key)
+        entry = self.data.get(hashed)
+        if entry is not None and entry[0] == key:
+            del self.data[hashed]
+
+    def _reap(self):
+        # Pop expired records off the heap; only delete entries whose expiry still matches,
+        # since a key may have been refreshed, evicted or deleted since the record was pushed
+        now = time.time()
+        while self.heap and self.heap[0][0] <= now:
+            expiry_time, _, hashed = heapq.heappop(self.heap)
+            entry = self.data.get(hashed)
+            if entry is not None and entry[2] == expiry_time:
+                del self.data[hashed]
+
+    def __len__(self):
+        return len(self.data)
@@ -9,13 +9,74 @@ To run locally:
    uvicorn app.main:app --reload
 """
 
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+import logging
+import logging.handlers
+import queue
+
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from typing import List, Optional
-import asyncio
+import os
+
+import orjson
 
 from app.scraper import WebScraper
 
+# While the app runs, log records from the "app" package are handed to a queue and formatted/written
+# by a background thread, so logging from coroutines never blocks the event loop on stdout/stderr I/O.
+# The queue handler is only attached for the lifespan, while its listener is running.
+_log_queue = queue.SimpleQueue()
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+_log_listener = logging.handlers.QueueListener(_log_queue, _log_handler)
+_log_queue_handler = logging.handlers.QueueHandler(_log_queue)
+_app_logger = logging.getLogger("app")
+_app_logger.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+
+# Threads available to asyncio.to_thread, which the scraper uses to parse and score pages off the
+# event loop. Defaults to the stdlib's own sizing; raise it if many large pages are parsed at once.
+THREAD_POOL_SIZE = int(os.getenv("THREAD_POOL_SIZE", str(min(32, (os.cpu_count() or 1) + 4))))
+
+
+class OrjsonResponse(JSONResponse):
+    """
+    JSON response rendered with orjson, which is much faster than the stdlib encoder on the large
+    raw_content strings in scrape results. Endpoints return it directly so FastAPI skips its
+    Python-level jsonable_encoder pass as well.
+    """
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Create the WebScraper shared by every request, so its result cache, pooled HTTP session and
+    headless Chromium browser (launched on first use) are reused across requests, and close it on
+    shutdown. It also runs the background log listener for the app's lifetime and installs an
+    explicitly sized default thread pool (THREAD_POOL_SIZE) on the event loop.
+    """
+    _log_listener.start()
+    _app_logger.addHandler(_log_queue_handler)
+    _app_logger.propagate = False
+    executor = ThreadPoolExecutor(max_workers=THREAD_POOL_SIZE, thread_name_prefix="scraper")
+    asyncio.get_running_loop().set_default_executor(executor)
+    try:
+        async with WebScraper() as scraper:
+            app.state.scraper = scraper
+            yield
+    finally:
+        executor.shutdown(wait=False)
+        _app_logger.removeHandler(_log_queue_handler)
+        _app_logger.propagate = True
+        _log_listener.stop()
+
+
 app = FastAPI(
     title="Web Scraper Microservice",
     description=(
@@ -23,7 +84,8 @@ app = FastAPI(
         "If browser_enabled is true, only Selenium is used; otherwise, Splash and fallback methods are used. "
         "Internal links are processed concurrently and image extraction is optional."
     ),
-    version="1.0"
+    version="1.0",
+    lifespan=lifespan
 )
 
 
@@ -32,40 +94,43 @@ class ScrapeRequest(BaseModel):
     query: Optional[str] = ""
     include_images: Optional[bool] = False
     browser_enabled: Optional[bool] = False  # If true, use only Selenium; if false, use Splash + fallback.
+    include_raw_content: Optional[bool] = True  # If false, results carry only the title and snippet.
+    max_age: Optional[float] = None  # Max age in seconds of a cached result to reuse; 0 forces a fresh scrape.
 
 
-@app.post("/scrape", summary="Scrape one or more URLs")
+@app.post("/scrape", summary="Scrape one or more URLs", response_class=OrjsonResponse)
 async def scrape_urls(request: ScrapeRequest):
     """
     Endpoint to scrape website(s). Clients provide one or more URLs, an optional query,
-    an optional include_images flag, and an optional browser_enabled flag.
+    an optional include_images flag, an optional browser_enabled flag, an optional
+    include_raw_content flag (default true), and an optional max_age in seconds.
 
     Example payload:
     {
       "urls": ["https://example.com"],
       "query": "sample query",
       "include_images": true,
-      "browser_enabled": true
+      "browser_enabled": true,
+      "include_raw_content": false,
+      "max_age": 30
     }
 
     Returns a JSON object with:
       - query, images (if enabled), results (each with page details), and response_time.
+    Duplicate URLs are scraped once; the results list still has one entry per URL in the payload.
     """
     if not request.urls or len(request.urls) == 0:
         raise HTTPException(status_code=400, detail="No URLs provided to scrape.")
 
-    tasks = []
-    # Process each URL concurrently.
-    for url in request.urls:
-        scraper = WebScraper(
-            query=request.query,
-            include_images=request.include_images,
-            browser_enabled=request.browser_enabled
-        )
-        tasks.append(scraper.scrape(url))
-
-    results = await asyncio.gather(*tasks)
-    return {"results": results}
+    results = await app.state.scraper.scrape_many(
+        request.urls,
+        query=request.query,
+        include_images=request.include_images,
+        browser_enabled=request.browser_enabled,
+        include_raw_content=request.include_raw_content,
+        max_age=request.max_age
+    )
+    return OrjsonResponse({"results": results})
 
 
 if __name__ == '__main__':
@@ -7,32 +7,50 @@ falls back to Playwright mode.
 
 Features:
   - If browser_enabled is True: Only Playwright is used.
-  - If browser_enabled is False: Splash and an aiohttp fallback are raced concurrently.
+  - If browser_enabled is False: an aiohttp fetch is tried first, hedged with Splash if it is slow or empty.
   - If raw_content (cleaned page text) is empty, automatically fall back to Playwright mode.
   - Optional image extraction (controlled by include_images).
 
 Requirements:
   - A running Splash service (e.g., via: docker run -p 8050:8050 scrapinghub/splash)
   - Playwright installed for Python (pip install playwright) and its browsers installed (playwright install)
-  - Python packages: aiohttp, playwright, beautifulsoup4, etc.
+  - Python packages: aiohttp, playwright, selectolax, beautifulsoup4, lxml, etc.
 """
 
 import random
-import re
 import time
 import asyncio
+import codecs
+import logging
 import os
+import re
+import zlib
+from collections import Counter
+from html import unescape
+from typing import List, Optional
 from dotenv import load_dotenv
-from urllib.parse import urljoin
-from difflib import SequenceMatcher
+from urllib.parse import urljoin, urlsplit, urlunsplit, parse_qsl, urlencode
 
 import aiohttp
-from bs4 import BeautifulSoup
-from playwright.async_api import async_playwright
+from bs4 import BeautifulSoup, UnicodeDammit
+from selectolax.lexbor import LexborHTMLParser
+try:
+    from rapidfuzz import fuzz
+    from rapidfuzz.utils import default_process
+except ImportError:  # optional: fall back to a pure-Python token overlap score
+    fuzz = default_process = None
+try:
+    import lxml  # noqa: F401
+    _PARSER = 'lxml'
+except ImportError:  # optional: BeautifulSoup's pure-Python parser works too, just slower
+    _PARSER = 'html.parser'
+from playwright.async_api import Browser, Playwright, async_playwright
 from urllib.parse import urlparse
 
 from app.cache_manager import Cache
 
+logger = logging.getLogger(__name__)
+
 load_dotenv()
 PROXY = os.getenv("PROXIES")
 
@@ -44,23 +62,314 @@ if parsed.username and parsed.password:
     proxy_settings["username"] = parsed.username
     proxy_settings["password"] = parsed.password
 
+# Only the leading part of a page is scored against the query; it carries the relevant signal
+# and keeps scoring cost bounded on very long pages.
+SIMILARITY_MAX_CHARS = 8192
+_TOKEN_RE = re.compile(r'\w+')
+
+# Response bodies are read in chunks and truncated at this size so a huge or misbehaving page
+# cannot exhaust memory or stall the event loop while being decoded.
+MAX_HTML_BYTES = 4 * 1024 * 1024
+# Bodies declared with any other Content-Type (PDFs, images, JSON, ...) are not read at all.
+HTML_CONTENT_TYPES = frozenset({'text/html', 'application/xhtml+xml', 'text/plain'})
+
+# Phrases typical of bot-check / CAPTCHA interstitials served instead of the requested page.
+# Only interstitial phrases are matched, not bare "bot"/"robot", which plenty of normal pages mention.
+_BLOCKED_RE = re.compile(
+    r'\b(?:captcha|unusual traffic|verify (?:that )?you are (?:a )?human|are you a robot|(?:i\'m|i am) not a robot)\b',
+    re.IGNORECASE
+)
+
+# The <title> is almost always near the top of the document; a regex over the head of the HTML
+# finds it without walking the DOM.
+TITLE_SCAN_CHARS = 4096
+_TITLE_RE = re.compile(r'<title[^>]*>([^<]{1,500})</title>', re.IGNORECASE)
+
+# HTTP validators (ETag / Last-Modified) and the HTML they validate are kept much longer than
+# parsed results, so an expired page can be revalidated with a conditional GET instead of
+# downloaded again. Each entry holds a zlib-compressed HTML body (typically 10-100 KB, up to about
+# 1 MB for a MAX_HTML_BYTES page), so the default of 500 entries stays around 50 MB in practice.
+VALIDATOR_EXPIRY = int(os.getenv("VALIDATOR_EXPIRY", "86400"))
+VALIDATOR_CACHE_SIZE = int(os.getenv("VALIDATOR_CACHE_SIZE", "500"))
+
+# raw_content is truncated to this many characters; it is what dominates the size of cached results.
+MAX_RAW_CHARS = int(os.getenv("MAX_RAW_CHARS", "50000"))
+# Length of the page text snippet returned as "content".
+SNIPPET_CHARS = 200
+# Maximum number of (url, query) results kept in the page cache, and for how many seconds.
+# Callers that need fresher pages pass max_age per request instead of lowering the expiry.
+PAGE_CACHE_SIZE = int(os.getenv("PAGE_CACHE_SIZE", "1024"))
+PAGE_CACHE_EXPIRY = int(os.getenv("PAGE_CACHE_EXPIRY", "60"))
+
+# Connection pool limits of the shared HTTP session: open connections overall and per host.
+# Requests to different hosts run in parallel while any single host sees at most HTTP_PER_HOST_LIMIT.
+HTTP_CONNECTION_LIMIT = int(os.getenv("HTTP_CONNECTION_LIMIT", "200"))
+HTTP_PER_HOST_LIMIT = int(os.getenv("HTTP_PER_HOST_LIMIT", "8"))
+
+# Number of worker coroutines one scrape_many() call uses to work through its URLs.
+SCRAPE_WORKERS = int(os.getenv("SCRAPE_WORKERS", "64"))
+
+# Seconds to wait for the plain aiohttp fetch before also trying Splash for the same page.
+SPLASH_HEDGE_DELAY = float(os.getenv("SPLASH_HEDGE_DELAY", "2"))
+
+# How long (seconds) a host stays known as needing JavaScript rendering, and how many hosts are tracked.
+JS_HOST_EXPIRY = int(os.getenv("JS_HOST_EXPIRY", "3600"))
+JS_HOST_CACHE_SIZE = 1000
+
+# Splash circuit breaker: after SPLASH_MAX_FAILURES consecutive connection errors or timeouts,
+# Splash is skipped for SPLASH_COOLDOWN seconds instead of every URL waiting on a dead service.
+SPLASH_TIMEOUT = float(os.getenv("SPLASH_TIMEOUT", "8"))
+SPLASH_MAX_FAILURES = int(os.getenv("SPLASH_MAX_FAILURES", "3"))
+SPLASH_COOLDOWN = float(os.getenv("SPLASH_COOLDOWN", "60"))
+# Seconds to wait before trying to launch Chromium again after a failed launch.
+BROWSER_LAUNCH_COOLDOWN = float(os.getenv("BROWSER_LAUNCH_COOLDOWN", "60"))
+
+# Upper bound on simultaneously open browser contexts (one per page being rendered).
+BROWSER_CONTEXT_LIMIT = int(os.getenv("BROWSER_CONTEXT_LIMIT", "8"))
+
+
+# Query parameters that only track the visitor and never change the page content.
+TRACKING_PARAMS = frozenset({"fbclid", "gclid", "dclid", "msclkid", "mc_cid", "mc_eid", "_ga", "igshid"})
+
+
+def normalize_url(url: str) -> str:
+    """
+    Canonicalize a URL for use as a cache key, so trivially different spellings of the same page
+    share one entry: lowercases scheme and host, drops the fragment and a trailing slash on the path,
+    removes tracking parameters (utm_* and TRACKING_PARAMS) and sorts the remaining query parameters.
+    """
+    parts = urlsplit(url.strip())
+    path = parts.path.rstrip('/') or '/'
+    params = [
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    ]
+    query = urlencode(sorted(params))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, query, ""))
+
 
 def compute_similarity(text1: str, text2: str) -> float:
     """
-    Compute similarity between two strings using SequenceMatcher.
+    Compute similarity between two strings using RapidFuzz's token set ratio, which ranks a page
+    by how well it covers the query's words regardless of their order or of extra page text.
+    Falls back to the share of text1's words that occur in text2 if RapidFuzz is not installed,
+    which stays on the same scale (a page containing every query word scores 1.0).
+    Only the first SIMILARITY_MAX_CHARS characters of each string are compared.
     Returns a float between 0 and 1.
     """
-    return SequenceMatcher(None, text1, text2).ratio()
+    text1, text2 = text1[:SIMILARITY_MAX_CHARS], text2[:SIMILARITY_MAX_CHARS]
+    if fuzz is None:
+        tokens1 = Counter(_TOKEN_RE.findall(text1.lower()))
+        tokens2 = Counter(_TOKEN_RE.findall(text2.lower()))
+        return sum((tokens1 & tokens2).values()) / max(1, sum(tokens1.values()))
+    # default_process lowercases and strips punctuation, so "Python," still matches "python"
+    return fuzz.token_set_ratio(text1, text2, processor=default_process) / 100.0
+
+
+def is_blocked(content: str) -> bool:
+    """
+    Return True if 'content' looks like an anti-bot or CAPTCHA page rather than real page content.
+    """
+    return _BLOCKED_RE.search(content) is not None
+
+
+async def read_capped(response: aiohttp.ClientResponse, max_bytes: int = MAX_HTML_BYTES) -> str:
+    """
+    Stream the response body in 64 KB chunks, stopping once 'max_bytes' have been read,
+    and decode it (see decode_html).
+    Returns "" without reading the body if the response declares a non-HTML Content-Type.
+    """
+    if 'Content-Type' in response.headers and response.content_type not in HTML_CONTENT_TYPES:
+        logger.info("Skipping %s body of %s", response.content_type, response.url)
+        return ""
+    buf = bytearray()
+    async for chunk in response.content.iter_chunked(65536):
+        buf.extend(chunk)
+        if len(buf) >= max_bytes:
+            del buf[max_bytes:]
+            break
+    # Charset detection on a multi-MB body is slow enough to stall the event loop; do it in a worker thread
+    return await asyncio.to_thread(decode_html, bytes(buf), response.charset)
+
+
+def decode_html(body: bytes, charset: Optional[str] = None) -> str:
+    """
+    Decode an HTML body using the charset from the Content-Type header if there is one.
+    Otherwise try strict UTF-8 (the common case), and only if that fails let UnicodeDammit
+    detect the encoding from <meta> declarations or charset-normalizer.
+    The body may have been cut off mid-character (see read_capped), so an incomplete trailing
+    UTF-8 sequence is dropped rather than treated as invalid.
+    """
+    if charset:
+        try:
+            return body.decode(charset, errors='replace')
+        except LookupError:
+            # Unknown charset name in the Content-Type header
+            pass
+    try:
+        return codecs.getincrementaldecoder('utf-8')().decode(body, final=False)
+    except UnicodeDecodeError:
+        markup = UnicodeDammit(body, is_html=True).unicode_markup
+        return markup if markup is not None else body.decode('utf-8', errors='replace')
+
+
+def _leading_text(strings, max_chars: int) -> str:
+    """
+    Join the words of text fragments with single spaces, stopping once more than 'max_chars'
+    characters have been collected.
+    """
+    words = []
+    total = -1
+    for string in strings:
+        for word in string.split():
+            words.append(word)
+            total += len(word) + 1
+        if total > max_chars:
+            break
+    return ' '.join(words)
+
+
+# Tags whose contents are never page text
+_NON_TEXT_TAGS = ['script', 'style', 'noscript', 'template']
+
+
+def parse_page(html: str, max_text_chars: Optional[int] = None) -> tuple:
+    """
+    Parse HTML and return (title, text, img_srcs), where text is the body text joined by spaces
+    and img_srcs are the raw 'src' attributes of all <img> tags in document order.
+    If 'max_text_chars' is set, text only covers the leading text nodes up to about that length,
+    instead of the whole document.
+    The title is taken from the first TITLE_SCAN_CHARS characters by regex when possible.
+    Script, style, noscript and template contents are left out of the text.
+    Uses selectolax for speed; falls back to BeautifulSoup (lxml when installed) if selectolax fails on the page.
+    """
+    match = _TITLE_RE.search(html, 0, TITLE_SCAN_CHARS)
+    title = unescape(match.group(1)).strip() if match else None
+    try:
+        tree = LexborHTMLParser(html)
+        if title is None:
+            title_node = tree.css_first('title')
+            title = title_node.text(strip=True) if title_node else ""
+        img_srcs = [img.attributes.get('src') for img in tree.css('img')]
+        tree.strip_tags(_NON_TEXT_TAGS)
+        if tree.body is None:
+            text = ""
+        elif max_text_chars is None:
+            text = tree.body.text(separator=' ', strip=True)
+        else:
+            text_nodes = (node.text_content for node in tree.body.traverse(include_text=True)
+                          if node.tag == '-text')
+            text = _leading_text(text_nodes, max_text_chars)
+    except Exception as e:
+        logger.warning("selectolax parse error, falling back to BeautifulSoup: %s", e)
+        soup = BeautifulSoup(html, _PARSER)
+        if title is None:
+            title = soup.title.string.strip() if soup.title and soup.title.string else ""
+        img_srcs = [img.get('src') for img in soup.find_all('img')]
+        for tag in soup.find_all(_NON_TEXT_TAGS):
+            tag.decompose()
+        if soup.body is None:
+            text = ""
+        elif max_text_chars is None:
+            text = soup.body.get_text(separator=' ', strip=True)
+        else:
+            text = _leading_text(soup.body.strings, max_text_chars)
+    return title, text, img_srcs
+
+
+# Image URLs ending in .svg or containing 'logo' or 'icon' are skipped, in a single regex scan
+_BAD_IMG_RE = re.compile(r'\.svg$|logo|icon', re.IGNORECASE)
+
+
+def select_images(img_srcs: list, base_url: str) -> list:
+    """
+    Select up to the first 5 valid image URLs from raw <img> 'src' values.
+    Converts relative URLs to absolute, skips disallowed extensions (.svg),
+    and filters out URLs containing 'logo' or 'icon'.
+    Repeated and inline (data:) sources are skipped before any URL joining.
+    """
+    images = []
+    seen = set()
+
+    for src in img_srcs:
+        if len(images) >= 5:
+            break
+        if not src or src in seen or src.startswith('data:'):
+            continue
+        seen.add(src)
+        full_url = urljoin(base_url, src)
+        if _BAD_IMG_RE.search(full_url):
+            continue
+        images.append(full_url)
+
+    return images
+
+
+def analyze_page(html: str, url: str, query: str, max_raw_chars: int = MAX_RAW_CHARS,
+                 full_text: bool = True) -> tuple:
+    """
+    Turn a page's HTML into (details, images) with a single parse: title, snippet, cleaned text
+    truncated to 'max_raw_chars' (raw_content), similarity score against 'query', and up to 5 image URLs.
+    If 'full_text' is False (only allowed without a query), just enough text for the snippet is
+    extracted and raw_content is left empty.
+    This is pure CPU work with no I/O, so callers run it in a worker thread.
+    """
+    title, text, img_srcs = parse_page(html, None if full_text else SNIPPET_CHARS)
+    # Only the head of the text can survive truncation; cut it before splitting so huge pages aren't
+    # split into words in full (2x leaves room for collapsed whitespace)
+    cleaned_text = ' '.join(text[:2 * max_raw_chars].split())[:max_raw_chars]
+    if not cleaned_text:
+        # Nothing to score; callers usually retry such pages with Playwright
+        return {"title": title, "url": url, "content": "", "score": 0.0, "raw_content": ""}, []
+    snippet = cleaned_text[:SNIPPET_CHARS] + "..." if len(cleaned_text) > SNIPPET_CHARS else cleaned_text
+    score = compute_similarity(query, cleaned_text) if query else 0.0
+    details = {
+        "title": title,
+        "url": url,
+        "content": snippet,
+        "score": score,
+        "raw_content": cleaned_text if full_text else ""
+    }
+    return details, select_images(img_srcs, url)
+
+
+def _deflate(text: str) -> bytes:
+    # Fast (level 1) compression for large strings kept in the caches
+    return zlib.compress(text.encode('utf-8', 'surrogatepass'), 1)
+
+
+def _inflate(data: bytes) -> str:
+    return zlib.decompress(data).decode('utf-8', 'surrogatepass')
+
+
+def pack_page(page: tuple) -> tuple:
+    """
+    Return a compact form of a (details, images) pair for the page cache: raw_content, which
+    dominates the entry size, is stored zlib-compressed. Reversed by unpack_page().
+    """
+    details, images = page
+    return {**details, "raw_content": None}, _deflate(details["raw_content"]), images
+
+
+def unpack_page(packed: tuple) -> tuple:
+    """
+    Rebuild the (details, images) pair from a pack_page() cache entry.
+    """
+    details, raw_content, images = packed
+    return {**details, "raw_content": _inflate(raw_content)}, images
 
 
 class WebScraper:
     """
     WebScraper implements a strategy for fast scraping.
-    It uses one of two modes based on the 'browser_enabled' flag:
+    A single instance is meant to be shared by the whole application: the HTTP session, the browser
+    and the result cache are long-lived, while query, include_images and browser_enabled are passed
+    per call. It uses one of two modes based on the 'browser_enabled' flag:
 
       - If browser_enabled is True: Only Playwright (headless Chromium) is used.
-      - If browser_enabled is False: Splash (JS-enabled via aiohttp) and a fallback aiohttp
-        method are raced concurrently.
+      - If browser_enabled is False: a plain aiohttp fetch is started first, and Splash (JS-enabled)
+        is started as a hedge only if that fetch hasn't returned a page within SPLASH_HEDGE_DELAY
+        seconds or came back empty; the first nonempty result wins.
 
     If the resulting raw content (cleaned text) is empty when not using browser mode, it falls back
     automatically to using Playwright.
@@ -68,216 +377,519 @@ class WebScraper:
     Image extraction is optional.
     """
 
-    USER_AGENTS = [
+    USER_AGENTS = (
         'Mozilla/5.0 (X11; CrOS x86_64 13729.56.0) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
         'Mozilla/5.0 (Windows NT 10.0; WOW64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
         'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.164 Safari/537.36',
-    ]
+    )
 
-    def __init__(self, query: str = "", include_images: bool = False, browser_enabled: bool = False) -> None:
+    def __init__(self, session: Optional[aiohttp.ClientSession] = None, browser: Optional[Browser] = None,
+                 cache_expiry: int = PAGE_CACHE_EXPIRY, cache_size: int = PAGE_CACHE_SIZE,
+                 max_raw_chars: int = MAX_RAW_CHARS) -> None:
         """
         Initialize the scraper with:
-          - query: Optional text to compare against page content.
-          - include_images: If True, image URLs are extracted.
-          - browser_enabled: If True, only Playwright is used; if False, Splash + fallback are used.
+          - session: aiohttp.ClientSession used for Splash and fallback requests. If None, the scraper
+            lazily creates its own pooled session on first use and closes it in aclose().
+          - browser: Playwright Chromium browser to render pages with. If None, the scraper starts
+            Playwright and launches its own headless Chromium on first use and closes it in aclose().
+          - cache_expiry: Lifetime in seconds of cached page details, shared across all requests.
+          - cache_size: Maximum number of (url, query) results kept in the cache.
+          - max_raw_chars: Length at which each page's raw_content is truncated.
+        """
+        self._session = session
+        self._owns_session = session is None
+        self._browser = browser
+        self._owns_browser = browser is None
+        self._playwright: Optional[Playwright] = None
+        self._browser_lock = asyncio.Lock()
+        self._browser_slots = asyncio.Semaphore(BROWSER_CONTEXT_LIMIT)  # open browser contexts
+        self._browser_retry_at = 0.0  # time.monotonic() before which no new Chromium launch is attempted
+        self._splash_failures = 0  # consecutive Splash connection errors / timeouts
+        self._splash_open_until = 0.0  # time.monotonic() until which Splash is skipped
+        self.cache = Cache(expiry=cache_expiry, max_size=cache_size)
+        self.max_raw_chars = max_raw_chars
+        # normalized URL -> {"etag", "last_modified", "html" (compressed)} from the last 200 response of
+        # fallback_get_html
+        self.validators = Cache(expiry=VALIDATOR_EXPIRY, max_size=VALIDATOR_CACHE_SIZE)
+        # host -> True for sites whose pages need JavaScript rendering, learned from Playwright fallbacks
+        self.js_hosts = Cache(expiry=JS_HOST_EXPIRY, max_size=JS_HOST_CACHE_SIZE)
+        self._rng = random.Random()  # private RNG for user-agent rotation
+        self._inflight: dict = {}  # cache key -> Future of the page currently being scraped
+        self._inflight_html: dict = {}  # (normalized URL, browser_enabled) -> Task fetching its HTML
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """
+        Return the shared HTTP session, creating it on first use. One long-lived session keeps
+        connections alive and caches DNS lookups across every URL the scraper fetches.
         """
-        self.cache = Cache(expiry=60)
-        self.query = query
-        self.include_images = include_images
-        self.browser_enabled = browser_enabled
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=HTTP_CONNECTION_LIMIT,
+                    limit_per_host=HTTP_PER_HOST_LIMIT,
+                    ttl_dns_cache=300,
+                    keepalive_timeout=30,
+                    enable_cleanup_closed=True
+                )
+            )
+            self._owns_session = True
+        return self._session
+
+    async def _ensure_browser(self) -> Optional[Browser]:
+        """
+        Return the shared Chromium browser, starting Playwright and launching it on first use so the
+        cold start is paid once rather than per URL. Returns None if Chromium cannot be launched;
+        after a failed launch no new attempt is made for BROWSER_LAUNCH_COOLDOWN seconds.
+        A browser that has disconnected (e.g. Chromium crashed) is dropped and launched again.
+        """
+        if self._browser is not None:
+            if self._browser.is_connected():
+                return self._browser
+        elif time.monotonic() < self._browser_retry_at:
+            return None
+        async with self._browser_lock:
+            if self._browser is not None and not self._browser.is_connected():
+                logger.warning("Playwright browser disconnected, relaunching")
+                self._browser = None
+                if self._playwright is not None:
+                    try:
+                        await self._playwright.stop()
+                    except Exception as e:
+                        logger.warning("Playwright stop error: %s", e)
+                    self._playwright = None
+            if self._browser is None and time.monotonic() >= self._browser_retry_at:
+                try:
+                    self._playwright = await async_playwright().start()
+                    self._browser = await self._playwright.chromium.launch(headless=True)
+                    self._owns_browser = True
+                except Exception as e:
+                    logger.warning("Playwright browser launch error, retrying in %ds: %s",
+                                   BROWSER_LAUNCH_COOLDOWN, e)
+                    self._browser_retry_at = time.monotonic() + BROWSER_LAUNCH_COOLDOWN
+                    if self._playwright is not None:
+                        await self._playwright.stop()
+                        self._playwright = None
+        return self._browser
+
+    async def aclose(self) -> None:
+        """
+        Release the resources owned by the scraper: the HTTP session and the browser it created itself.
+        """
+        if self._owns_session and self._session is not None and not self._session.closed:
+            await self._session.close()
+        if self._owns_browser and self._browser is not None:
+            await self._browser.close()
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    async def __aenter__(self) -> "WebScraper":
+        """
+        Open the shared HTTP session up front, for use as 'async with WebScraper() as scraper:'.
+        """
+        self._get_session()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.aclose()
+
+    async def _render_with_browser(self, browser: Browser, url: str, proxy: dict = None) -> str:
+        """
+        Render 'url' in a fresh, isolated context of the shared Chromium browser.
+        The context is always closed afterwards; the browser itself stays alive for reuse.
+        """
+        async with self._browser_slots:
+            context = await browser.new_context(user_agent=self._rng.choice(self.USER_AGENTS), proxy=proxy)
+            try:
+                page = await context.new_page()
+                await page.goto(url, wait_until="networkidle", timeout=15000)
+                return await page.content()
+            finally:
+                await context.close()
 
     async def get_html_using_playwright(self, url: str) -> str:
         """
-        Asynchronously retrieve rendered HTML using Playwright in headless mode.
+        Asynchronously retrieve rendered HTML using the shared headless Playwright browser.
         First tries without a proxy, then retries using a proxy if the first attempt fails.
         """
+        browser = await self._ensure_browser()
+        if browser is None:
+            return ""
+
         try:
             # First attempt: no proxy
-            async with async_playwright() as p:
-                browser = await p.chromium.launch(headless=True)
-                context = await browser.new_context(user_agent=random.choice(self.USER_AGENTS))
-                page = await context.new_page()
-                await page.goto(url, wait_until="networkidle", timeout=15000)
-                await asyncio.sleep(1)
-                html = await page.content()
-                await browser.close()
-                return html
+            return await self._render_with_browser(browser, url)
         except Exception as e:
-            print(f"Playwright no-proxy error for {url}: {e}")
+            logger.warning("Playwright no-proxy error for %s: %s", url, e)
 
         # Retry using proxy if first attempt fails
         if PROXY:
             try:
-                async with async_playwright() as p:
-                    browser = await p.chromium.launch(headless=True, proxy=proxy_settings)
-                    context = await browser.new_context(user_agent=random.choice(self.USER_AGENTS))
-                    page = await context.new_page()
-                    await page.goto(url, wait_until="networkidle", timeout=15000)
-                    await asyncio.sleep(1)
-                    html = await page.content()
-                    await browser.close()
-                    return html
+                return await self._render_with_browser(browser, url, proxy=proxy_settings)
             except Exception as e:
-                print(f"Playwright with-proxy error for {url}: {e}")
+                logger.warning("Playwright with-proxy error for %s: %s", url, e)
 
         return ""
 
     async def get_html_using_splash(self, url: str) -> str:
         """
         Asynchronously retrieve rendered HTML from a Splash service using aiohttp.
+        Returns "" right away while the circuit breaker is open (see SPLASH_MAX_FAILURES).
         """
+        if time.monotonic() < self._splash_open_until:
+            return ""
         splash_url = "http://localhost:8050/render.html"
-        params = {"url": url, "wait": 2, "timeout": 10}
+        params = {"url": url, "wait": 2, "timeout": SPLASH_TIMEOUT}
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(splash_url, params=params, timeout=15) as response:
-                    if response.status == 200:
-                        return await response.text()
+            async with self._get_session().get(splash_url, params=params, timeout=SPLASH_TIMEOUT + 2) as response:
+                # Other error statuses are about the rendered page, not the health of Splash itself
+                if response.status == 503:
+                    raise aiohttp.ClientResponseError(response.request_info, response.history, status=503)
+                self._splash_failures = 0
+                if response.status == 200:
+                    return await read_capped(response)
+        except (aiohttp.ClientConnectionError, aiohttp.ClientResponseError, asyncio.TimeoutError) as e:
+            self._splash_failures += 1
+            if self._splash_failures >= SPLASH_MAX_FAILURES:
+                self._splash_open_until = time.monotonic() + SPLASH_COOLDOWN
+                self._splash_failures = 0
+                logger.warning("Splash failed %d times in a row, skipping it for %ds",
+                               SPLASH_MAX_FAILURES, SPLASH_COOLDOWN)
+            logger.warning("Splash error for %s: %s", url, e)
         except Exception as e:
-            print(f"Splash error for {url}: {e}")
+            logger.warning("Splash error for %s: %s", url, e)
         return ""
 
     async def fallback_get_html(self, url: str) -> str:
         """
         Asynchronously retrieve HTML using aiohttp as the final fallback.
+        If the page was fetched before and the server sent an ETag or Last-Modified header, the
+        request is made conditional; on 304 Not Modified the previously downloaded HTML is returned.
         """
+        key = normalize_url(url)
+        validators = self.validators.get(key)
         try:
-            async with aiohttp.ClientSession() as session:
-                headers = {"User-Agent": random.choice(self.USER_AGENTS)}
-                async with session.get(url, headers=headers, timeout=10) as response:
-                    if response.status == 200:
-                        return await response.text()
+            headers = {"User-Agent": self._rng.choice(self.USER_AGENTS)}
+            if validators:
+                if validators["etag"]:
+                    headers["If-None-Match"] = validators["etag"]
+                if validators["last_modified"]:
+                    headers["If-Modified-Since"] = validators["last_modified"]
+            async with self._get_session().get(url, headers=headers, timeout=10) as response:
+                if response.status == 304 and validators:
+                    self.validators.set(key, validators)
+                    return _inflate(validators["html"])
+                if response.status == 200:
+                    html = await read_capped(response)
+                    etag = response.headers.get("ETag")
+                    last_modified = response.headers.get("Last-Modified")
+                    if html and (etag or last_modified):
+                        self.validators.set(key, {"etag": etag, "last_modified": last_modified,
+                                                  "html": _deflate(html)})
+                    return html
         except Exception as e:
-            print(f"Fallback error for {url}: {e}")
+            logger.warning("Fallback error for %s: %s", url, e)
         return ""
 
-    async def get_html(self, url: str) -> str:
+    async def _head_unchanged(self, url: str) -> Optional[str]:
+        """
+        If the page was downloaded before with a Last-Modified header, issue a HEAD request and return
+        the stored HTML when the server still reports the same Last-Modified (or ETag), so the page
+        body doesn't have to be fetched or rendered again. Returns None otherwise.
+        """
+        key = normalize_url(url)
+        validators = self.validators.get(key)
+        if not validators or not validators["last_modified"]:
+            return None
+        try:
+            headers = {"User-Agent": self._rng.choice(self.USER_AGENTS)}
+            async with self._get_session().head(url, headers=headers, timeout=5,
+                                                allow_redirects=True) as response:
+                if response.status != 200:
+                    return None
+                etag = response.headers.get("ETag")
+                if etag and validators["etag"] and etag != validators["etag"]:
+                    return None
+                if response.headers.get("Last-Modified") != validators["last_modified"]:
+                    return None
+        except Exception as e:
+            logger.warning("HEAD error for %s: %s", url, e)
+            return None
+        self.validators.set(key, validators)
+        return _inflate(validators["html"])
+
+    async def get_html(self, url: str, browser_enabled: bool = False) -> str:
         """
         Retrieve the HTML content of a page according to the browser_enabled flag:
           - If browser_enabled is True: use only Playwright.
-          - Otherwise: concurrently run Splash and fallback methods and return the first nonempty result.
+          - Otherwise: if a HEAD request shows the page is unchanged since it was last downloaded,
+            return the stored HTML; else fetch it with the plain aiohttp fallback and, if that hasn't
+            produced a page within SPLASH_HEDGE_DELAY seconds (or came back empty), hedge with Splash.
+            The first nonempty result wins, even if the other method finishes first with an empty body.
+        The HEAD preflight is skipped in browser mode, where the rendered page isn't governed by
+        HTTP Last-Modified.
         """
-        if self.browser_enabled:
+        if browser_enabled:
             return await self.get_html_using_playwright(url)
-        else:
-            tasks = {
-                "splash": asyncio.create_task(self.get_html_using_splash(url)),
-                "fallback": asyncio.create_task(self.fallback_get_html(url))
-            }
-            done, pending = await asyncio.wait(tasks.values(), return_when=asyncio.FIRST_COMPLETED, timeout=12)
-            for task in pending:
+        unchanged = await self._head_unchanged(url)
+        if unchanged:
+            return unchanged
+        return await self._first_truthy([self.fallback_get_html(url), self.get_html_using_splash(url)],
+                                        stagger=SPLASH_HEDGE_DELAY)
+
+    async def _get_html_shared(self, url: str, browser_enabled: bool) -> str:
+        """
+        get_html(), coalesced per normalized URL: concurrent calls for the same page (e.g. the same URL
+        scored against different queries) share one fetch instead of each hitting the network.
+        """
+        key = (normalize_url(url), browser_enabled)
+        task = self._inflight_html.get(key)
+        if task is None:
+            task = asyncio.create_task(self.get_html(url, browser_enabled))
+            self._inflight_html[key] = task
+            task.add_done_callback(lambda _: self._inflight_html.pop(key, None))
+        # Shielded so a cancelled caller doesn't cancel the fetch for the others
+        return await asyncio.shield(task)
+
+    @staticmethod
+    async def _first_truthy(coros: list, timeout: float = 12, stagger: float = 0.0) -> str:
+        """
+        Run 'coros' concurrently and return the first non-empty result, cancelling the rest.
+        Coroutines are started in order, each one 'stagger' seconds after the previous, or as soon
+        as everything started so far has come back empty.
+        An empty or failed result does not end the race; "" is returned only if every
+        coroutine comes back empty or the timeout expires.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        waiting = list(coros)
+        tasks = set()
+        try:
+            while waiting or tasks:
+                if waiting:
+                    tasks.add(asyncio.create_task(waiting.pop(0)))
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                done, tasks = await asyncio.wait(tasks, timeout=min(stagger, remaining) if waiting else remaining,
+                                                 return_when=asyncio.FIRST_COMPLETED)
+                if not done and not waiting:
+                    break  # timed out
+                for task in done:
+                    if task.cancelled():
+                        continue
+                    if task.exception() is not None:
+                        logger.warning("Error in task: %s", task.exception())
+                    elif task.result():
+                        return task.result()
+        finally:
+            for task in tasks:
                 task.cancel()
-            result = ""
-            for task in done:
-                try:
-                    candidate = task.result()
-                    if candidate:
-                        result = candidate
-                        break
-                except Exception as e:
-                    print(f"Error in task: {e}")
-            return result
+            for coro in waiting:
+                coro.close()
+        return ""
 
     def extract_images(self, html: str, base_url: str) -> list:
         """
-        Extract up to the first 5 valid image URLs from HTML.
-        Converts relative URLs to absolute, skips disallowed extensions (.svg),
-        and filters out URLs containing 'logo' or 'icon'.
+        Extract up to the first 5 valid image URLs from HTML (see select_images()).
         """
         if not html:
             return []
 
-        soup = BeautifulSoup(html, 'html.parser')
-        images = []
-        disallowed_ext = '.svg'
-        disallowed_keywords = ['logo', 'icon']
-
-        for img in soup.find_all('img'):
-            if len(images) >= 5:
-                break
-            src = img.get('src')
-            if not src:
-                continue
-            full_url = urljoin(base_url, src)
-            lower_url = full_url.lower()
-            if lower_url.endswith(disallowed_ext):
-                continue
-            if any(keyword in lower_url for keyword in disallowed_keywords):
-                continue
-            images.append(full_url)
-
-        return images
-
-    async def scrape_details(self, url: str) -> dict:
+        _, _, img_srcs = parse_page(html)
+        return select_images(img_srcs, base_url)
+
+    async def scrape_details(self, url: str, query: str = "", browser_enabled: bool = False,
+                             html: Optional[str] = None) -> dict:
         """
         Asynchronously scrape detailed page information.
         Extracts the title, a snippet, full text (raw_content), and computes a similarity score against the query.
+        If 'html' is given it is used as-is instead of fetching the page again.
 
         If the initial result is empty (raw_content is an empty string) and browser_enabled is False,
         it automatically falls back to using Playwright.
-        Results are cached.
+        Results are cached per (url, query), so repeated requests for the same page share one entry.
         """
-        cached = self.cache.get(url)
-        if cached:
-            return cached
-
-        # First attempt: get HTML using the chosen method.
-        html = await self.get_html(url)
-        # If html is empty, try browser fallback automatically if we're not already in browser mode.
-        if (not html or not html.strip()) and not self.browser_enabled:
-            print(f"Fallback: raw HTML empty for {url}, trying Playwright mode.")
-            html = await self.get_html_using_playwright(url)
+        page = await self._scrape_page(url, query, browser_enabled, html)
+        if page is None:
+            return {"title": "", "url": url, "content": "", "score": 0.0, "raw_content": ""}
+        details, _ = page
+        return details
+
+    @staticmethod
+    def _cache_key(url: str, query: Optional[str], browser_enabled: bool = False, full_text: bool = True) -> str:
+        """
+        Build the string key under which the page for (url, query) is cached.
+        The URL is normalized (see normalize_url), so tracking parameters, fragments and similar
+        variations of the same page hit the same cache entry. Pages fetched with a browser and
+        snippet-only pages (full_text=False) are cached separately, since they differ in content.
+        """
+        key = f"{normalize_url(url)}\n{query or ''}\n{int(browser_enabled)}"
+        return key if full_text else key + "\nsnippet"
 
-        if not html:
-            result = {"title": "", "url": url, "content": "", "score": 0.0, "raw_content": ""}
-            self.cache.set(url, result)
-            return result
+    async def _scrape_page(self, url: str, query: str, browser_enabled: bool,
+                           html: Optional[str] = None, full_text: bool = True,
+                           max_age: Optional[float] = None) -> Optional[tuple]:
+        """
+        Return the cached (details, images) pair for (url, query), building it if needed, or None if
+        no HTML could be retrieved (failures are not cached). Cached pairs older than 'max_age' seconds
+        are rebuilt; max_age=0 always scrapes the page again.
+        Concurrent calls for the same key are coalesced: only the first one fetches and parses the
+        page, the others await its result. If that call fails, each waiter builds the page itself.
+        """
+        cache_key = self._cache_key(url, query, browser_enabled, full_text)
+        cached = self.cache.get(cache_key, max_age)
+        if cached:
+            return unpack_page(cached)
 
-        soup = BeautifulSoup(html, 'html.parser')
-        text = soup.get_text(separator=' ', strip=True)
-        cleaned_text = re.sub(r'\s+', ' ', text).strip()
+        inflight = self._inflight.get(cache_key)
+        if inflight is not None:
+            await asyncio.wait({inflight})
+            if not inflight.cancelled():
+                return inflight.result()
 
-        # If raw content is empty after cleaning and we haven't used browser fallback, try Playwright once.
-        if not cleaned_text and not self.browser_enabled:
-            print(f"Fallback: raw content empty for {url}, trying Playwright mode.")
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[cache_key] = future
+        try:
+            page = await self._build_page(url, query, browser_enabled, html, full_text)
+        except BaseException:
+            future.cancel()
+            raise
+        else:
+            future.set_result(page)
+            if page is not None:
+                self.cache.set(cache_key, pack_page(page))
+            return page
+        finally:
+            if self._inflight.get(cache_key) is future:
+                del self._inflight[cache_key]
+
+    async def _build_page(self, url: str, query: str, browser_enabled: bool,
+                          html: Optional[str] = None, full_text: bool = True) -> Optional[tuple]:
+        """
+        Build (details, images) for a page from a single parse of its HTML, so text extraction,
+        scoring and image selection share one DOM traversal. Returns None if no HTML is available.
+        With full_text=False only the snippet is extracted (see analyze_page).
+        Hosts whose pages only had content once rendered by Playwright are remembered (js_hosts), and
+        their pages go straight to Playwright instead of being fetched without a browser first.
+        """
+        host = urlsplit(url).netloc.lower()
+        rendered = browser_enabled  # whether Playwright has been tried for this page already
+        page = None
+        if html is None and not browser_enabled and self.js_hosts.get(host):
+            html_js = await self._get_html_shared(url, True)
+            if html_js and html_js.strip():
+                page = await asyncio.to_thread(analyze_page, html_js, url, query, self.max_raw_chars, full_text)
+            rendered = True
+            if page is None or not page[0]["content"]:
+                # The render had no text either: forget the host and take the normal path
+                self.js_hosts.delete(host)
+                page = None
+
+        if page is None:
+            # First attempt: get HTML using the chosen method, unless the caller already fetched it.
+            if html is None:
+                html = await self._get_html_shared(url, browser_enabled)
+            if html and html.strip():
+                # Parsing and scoring are CPU-bound; run them off the event loop.
+                page = await asyncio.to_thread(analyze_page, html, url, query, self.max_raw_chars, full_text)
+
+        # Bot checks / CAPTCHA interstitials often only trip on plain HTTP clients; judge by the title and
+        # the leading text, since the raw HTML of any page may mention e.g. robots in <meta> tags.
+        blocked = (page is not None and not rendered and bool(page[0]["content"])
+                   and is_blocked(f'{page[0]["title"]} {page[0]["content"]}'))
+
+        # If the HTML or its cleaned text is empty, or the page is blocked, and the page wasn't rendered
+        # already, fall back to Playwright once. Empty HTML goes straight to Playwright without being parsed.
+        if (page is None or not page[0]["content"] or blocked) and not rendered:
+            if blocked:
+                logger.info("Fallback: blocked page for %s, trying Playwright mode.", url)
+            else:
+                reason = "raw HTML" if page is None else "raw content"
+                logger.info("Fallback: %s empty for %s, trying Playwright mode.", reason, url)
             html_alt = await self.get_html_using_playwright(url)
             if html_alt:
-                soup = BeautifulSoup(html_alt, 'html.parser')
-                text = soup.get_text(separator=' ', strip=True)
-                cleaned_text = re.sub(r'\s+', ' ', text).strip()
-
-        title = soup.title.string.strip() if soup.title and soup.title.string else ""
-        snippet = cleaned_text[:200] + "..." if len(cleaned_text) > 200 else cleaned_text
-        score = compute_similarity(self.query, cleaned_text) if self.query else 0.0
-        result = {
-            "title": title,
-            "url": url,
-            "content": snippet,
-            "score": round(score, 8),
-            "raw_content": cleaned_text
-        }
-        self.cache.set(url, result)
-        return result
-
-    async def scrape(self, url: str) -> dict:
+                page_alt = await asyncio.to_thread(analyze_page, html_alt, url, query, self.max_raw_chars,
+                                                   full_text)
+                if page_alt[0]["content"]:
+                    if not blocked:
+                        # Only pages with no text of their own mark a host as needing JavaScript;
+                        # a bot check on one page says nothing about the rest of the site
+                        self.js_hosts.set(host, True)
+                    page = page_alt
+                elif not blocked:
+                    page = page_alt
+
+        return page
+
+    async def scrape(self, url: str, query: str = "", include_images: bool = False,
+                     browser_enabled: bool = False, include_raw_content: bool = True,
+                     max_age: Optional[float] = None) -> dict:
         """
         Asynchronously scrape the main page from 'url':
-          - Retrieve rendered HTML using the selected method.
-          - Optionally extract image URLs.
-          - Scrape only the details of the page provided without extracting internal links.
+          - Retrieve rendered HTML once using the selected method (Playwright only if browser_enabled),
+            falling back to Playwright if it is empty, or reuse the cached result for (url, query).
+          - Parse it once to get both the page details and, if include_images is set, image URLs.
+          - Scrape only the details of the page provided without extracting internal links,
+            scoring the page text against 'query'.
+          - If include_raw_content is False, raw_content is left empty; without a query only the
+            text needed for the snippet is extracted.
+          - If max_age is given, a cached result is only reused if it is at most max_age seconds old
+            (0 forces a fresh scrape).
 
         Returns a dictionary with the query, images (if enabled), the page details, and total response time.
         """
         start_time = time.time()
-        html = await self.get_html(url)
-        if not html:
+        # Scoring needs the full text even if the caller doesn't want it back
+        full_text = bool(query) or include_raw_content
+        page = await self._scrape_page(url, query, browser_enabled, full_text=full_text, max_age=max_age)
+        if page is None:
             return {"error": f"Unable to retrieve main page content for {url}"}
-        images = self.extract_images(html, url) if self.include_images else []
-        details = await self.scrape_details(url)
+        details, images = page
+        if details["url"] != url:
+            # Cached under the normalized URL by a request that spelled it differently
+            details = {**details, "url": url}
+        if not include_raw_content and details["raw_content"]:
+            details = {**details, "raw_content": ""}
         response_time = round(time.time() - start_time, 2)
         return {
-            "query": self.query,
-            "images": images,
+            "query": query,
+            "images": images if include_images else [],
             "result": details,
             "response_time": response_time
         }
+
+    async def scrape_many(self, urls: List[str], query: str = "", include_images: bool = False,
+                          browser_enabled: bool = False, include_raw_content: bool = True,
+                          max_age: Optional[float] = None) -> List[dict]:
+        """
+        Scrape a batch of URLs through the shared session and browser, returning one scrape() result
+        per input URL in the same order. Duplicate URLs are scraped once.
+        URLs are fed through a bounded queue to at most SCRAPE_WORKERS worker coroutines, so large
+        batches don't create a task per URL up front; politeness is enforced per host by the session's
+        connection pool and browser rendering by BROWSER_CONTEXT_LIMIT.
+        """
+        unique_urls = list(dict.fromkeys(urls))
+        by_url = {}
+        n_workers = min(SCRAPE_WORKERS, len(unique_urls))
+        queue = asyncio.Queue(maxsize=2 * n_workers)
+
+        async def worker() -> None:
+            while (url := await queue.get()) is not None:
+                try:
+                    by_url[url] = await self.scrape(url, query, include_images, browser_enabled,
+                                                    include_raw_content, max_age)
+                except Exception as e:
+                    # One failing URL must not take its worker down and stall the rest of the batch
+                    logger.exception("Scrape failed for %s", url)
+                    by_url[url] = {"error": f"Unable to scrape {url}: {e}"}
+
+        async def feed() -> None:
+            for url in unique_urls:
+                await queue.put(url)
+            for _ in range(n_workers):
+                await queue.put(None)
+
+        await asyncio.gather(feed(), *(worker() for _ in range(n_workers)))
+        return [by_url[url] for url in urls]
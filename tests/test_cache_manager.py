@@ -0,0 +1,66 @@
+import time
+
+from app.cache_manager import Cache
+
+
+def test_cache_get_and_expiry():
+    # Values are returned until their expiry time passes
+    cache = Cache(expiry=0.05)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    time.sleep(0.06)
+    assert cache.get("a") is None
+
+
+def test_cache_get_with_max_age():
+    # max_age rejects entries older than the caller allows without dropping them
+    cache = Cache(expiry=60)
+    cache.set("a", 1)
+    time.sleep(0.06)
+    assert cache.get("a", max_age=0.05) is None
+    assert cache.get("a", max_age=1) == 1
+    assert cache.get("a") == 1
+
+
+def test_cache_evicts_least_recently_used():
+    # Once max_size is exceeded the least recently used entry is dropped
+    cache = Cache(expiry=60, max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_cache_reaps_expired_entries_on_set():
+    # Expired entries are removed opportunistically, without a full scan
+    cache = Cache(expiry=0.05)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    time.sleep(0.06)
+    cache.set("c", 3)
+    assert len(cache) == 1
+
+
+def test_cache_guards_against_hash_collisions(monkeypatch):
+    # Two keys that hash to the same digest must not return each other's value
+    monkeypatch.setattr("app.cache_manager._hash_key", lambda key: 42)
+    cache = Cache(expiry=60)
+    cache.set("a", 1)
+    assert cache.get("b") is None
+    cache.delete("b")
+    assert cache.get("a") == 1
+
+
+def test_cache_heap_stays_bounded():
+    # Refreshed and evicted keys leave stale heap records, which are compacted instead of piling up
+    cache = Cache(expiry=60, max_size=10)
+    for i in range(1000):
+        cache.set(str(i), i)
+    for i in range(1000):
+        cache.set("hot", i)
+    assert len(cache) == 10
+    assert len(cache.heap) <= 2 * len(cache)
+    assert cache.get("hot") == 999
@@ -1,13 +1,417 @@
-from app.scraper import compute_similarity, is_blocked
+import asyncio
+
+import aiohttp
+
+from app.scraper import (WebScraper, compute_similarity, decode_html, is_blocked, normalize_url, pack_page,
+                         read_capped, select_images, unpack_page)
 
 
 def test_compute_similarity():
     # Basic similarity should return a float value between 0 and 1
     similarity = compute_similarity("hello", "hello world")
     assert 0 < similarity <= 1
+    # Case and punctuation do not lower the score
+    assert compute_similarity("Python asyncio", "PYTHON, asyncio! tutorial") == 1.0
+
+
+def test_compute_similarity_without_rapidfuzz(monkeypatch):
+    # The fallback scores query coverage, so long pages containing the query still score high
+    monkeypatch.setattr("app.scraper.fuzz", None)
+    page = "Python asyncio tutorial. " + "filler text " * 200
+    assert compute_similarity("python asyncio", page) == 1.0
+    assert compute_similarity("python django", page) == 0.5
+    assert compute_similarity("rust", page) == 0.0
 
 
 def test_is_blocked():
     # Should return True for pages that mention "captcha"
     blocked_content = "Please verify that you are human, captcha validation required."
     assert is_blocked(blocked_content)
+    assert is_blocked("Are you a robot? Our systems have detected unusual traffic.")
+
+
+def test_is_blocked_ignores_normal_pages():
+    # Pages that merely mention bots or robots are not bot checks
+    assert not is_blocked("Telegram Bot API")
+    assert not is_blocked("Build a Discord bot in Python")
+    assert not is_blocked("Robot vacuum review 2026")
+    assert not is_blocked("Scroll to the bottom")
+
+
+def test_normalize_url():
+    # Tracking params, fragments, host case and trailing slashes should not create distinct keys
+    canonical = normalize_url("https://example.com/page?b=2&a=1")
+    assert normalize_url("HTTPS://Example.com/page/?a=1&b=2&utm_source=x#top") == canonical
+    assert normalize_url("https://example.com") == "https://example.com/"
+
+
+def test_pack_page_round_trip():
+    # Cached pages store raw_content compressed but unpack to the original pair
+    page = ({"title": "t", "url": "u", "content": "c", "score": 0.5, "raw_content": "text " * 100}, ["img"])
+    packed = pack_page(page)
+    assert packed[0]["raw_content"] is None
+    assert unpack_page(packed) == page
+
+
+def _fake_scraper(plain_html, rendered_html):
+    # WebScraper whose fetchers are replaced by canned pages; records which ones were used
+    scraper = WebScraper()
+    calls = []
+
+    async def get_html(url, browser_enabled=False):
+        calls.append("browser" if browser_enabled else "plain")
+        return rendered_html if browser_enabled else plain_html
+
+    async def get_html_using_playwright(url):
+        calls.append("fallback")
+        return rendered_html
+
+    scraper.get_html = get_html
+    scraper.get_html_using_playwright = get_html_using_playwright
+    return scraper, calls
+
+
+def test_js_hosts_learned_from_empty_pages():
+    # A host whose page only had text once rendered goes straight to Playwright afterwards
+    scraper, calls = _fake_scraper("<html><body></body></html>", "<html><body>rendered</body></html>")
+
+    async def run():
+        await scraper.scrape("http://spa.example/a")
+        assert calls == ["plain", "fallback"]
+        calls.clear()
+        result = await scraper.scrape("http://spa.example/b")
+        assert calls == ["browser"]
+        assert result["result"]["content"] == "rendered"
+
+    asyncio.run(run())
+
+
+def test_script_only_page_falls_back_to_playwright():
+    # Script and style contents are not page text, so a shell page still triggers the fallback
+    scraper, calls = _fake_scraper("<html><head><style>body{}</style></head>"
+                                   "<body><script>window.app = {}</script><noscript>Enable JS</noscript></body></html>",
+                                   "<html><body>rendered</body></html>")
+
+    async def run():
+        result = await scraper.scrape("http://shell.example/a")
+        assert calls == ["plain", "fallback"]
+        assert result["result"]["content"] == "rendered"
+
+    asyncio.run(run())
+
+
+def test_js_hosts_forgotten_after_empty_render():
+    # A pinned host whose render has no text is dropped and the page takes the normal path
+    scraper, calls = _fake_scraper("<html><body>static</body></html>", "<html><body></body></html>")
+    scraper.js_hosts.set("static.example", True)
+
+    async def run():
+        result = await scraper.scrape("http://static.example/a")
+        assert calls == ["browser", "plain"]
+        assert result["result"]["content"] == "static"
+        assert scraper.js_hosts.get("static.example") is None
+
+    asyncio.run(run())
+
+
+def test_blocked_page_retry_does_not_pin_host():
+    # A bot-check page is retried with Playwright, but its host is not marked as needing JavaScript
+    scraper, calls = _fake_scraper("<html><body>Please verify you are human</body></html>",
+                                   "<html><body>real content</body></html>")
+
+    async def run():
+        result = await scraper.scrape("http://site.example/a")
+        assert calls == ["plain", "fallback"]
+        assert result["result"]["content"] == "real content"
+        assert scraper.js_hosts.get("site.example") is None
+
+    asyncio.run(run())
+
+
+def test_browser_pages_cached_separately():
+    # A plain-fetched page in the cache does not answer a request that asked for a browser
+    scraper, calls = _fake_scraper("<html><body>static</body></html>", "<html><body>rendered</body></html>")
+
+    async def run():
+        await scraper.scrape("http://both.example/a")
+        result = await scraper.scrape("http://both.example/a", browser_enabled=True)
+        assert calls == ["plain", "browser"]
+        assert result["result"]["content"] == "rendered"
+
+    asyncio.run(run())
+
+
+def _slow_scraper():
+    # WebScraper whose get_html takes a moment, counting how often it is called
+    scraper = WebScraper()
+    calls = []
+
+    async def get_html(url, browser_enabled=False):
+        calls.append(url)
+        await asyncio.sleep(0.05)
+        return "<html><body>page</body></html>"
+
+    scraper.get_html = get_html
+    return scraper, calls
+
+
+def test_concurrent_scrapes_share_one_fetch():
+    # Two simultaneous scrapes of the same URL fetch it only once
+    scraper, calls = _slow_scraper()
+
+    async def run():
+        first, second = await asyncio.gather(scraper.scrape("http://example.com/a"),
+                                             scraper.scrape("http://example.com/a"))
+        assert first == second
+        assert len(calls) == 1
+
+    asyncio.run(run())
+
+
+def test_cancelled_scrape_does_not_fail_waiters():
+    # Cancelling the caller that started the fetch still lets the other caller finish
+    scraper, calls = _slow_scraper()
+
+    async def run():
+        first = asyncio.create_task(scraper.scrape("http://example.com/a"))
+        second = asyncio.create_task(scraper.scrape("http://example.com/a"))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        result = await second
+        assert result["result"]["content"] == "page"
+        assert first.cancelled()
+        assert len(calls) == 1
+
+    asyncio.run(run())
+
+
+def test_scrape_many_keeps_order_and_isolates_failures():
+    # Results follow the input order, duplicates are scraped once and a failing URL yields an error entry
+    scraper = WebScraper()
+    scraped = []
+
+    async def scrape(url, *args):
+        scraped.append(url)
+        if url == "http://bad":
+            raise RuntimeError("boom")
+        return {"result": url}
+
+    scraper.scrape = scrape
+    urls = ["http://a", "http://bad", "http://b", "http://a"]
+    results = asyncio.run(scraper.scrape_many(urls))
+    assert sorted(scraped) == ["http://a", "http://b", "http://bad"]
+    assert [r.get("result") for r in results] == ["http://a", None, "http://b", "http://a"]
+    assert "boom" in results[1]["error"]
+
+
+class _FakeContent:
+    def __init__(self, body):
+        self.body = body
+
+    async def iter_chunked(self, size):
+        for i in range(0, len(self.body), size):
+            yield self.body[i:i + size]
+
+
+class _FakeResponse:
+    # Minimal stand-in for aiohttp.ClientResponse as used by read_capped
+    def __init__(self, body, content_type="text/html", charset=None, status=200, headers=None):
+        self.content = _FakeContent(body)
+        self.headers = {"Content-Type": content_type} if content_type else {}
+        self.headers.update(headers or {})
+        self.content_type = content_type or "application/octet-stream"
+        self.charset = charset
+        self.status = status
+        self.url = "http://example.com/"
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+def test_read_capped_skips_non_html_content_types():
+    # Non-HTML bodies are not read; a missing Content-Type is still read
+    assert asyncio.run(read_capped(_FakeResponse(b"%PDF-1.7", content_type="application/pdf"))) == ""
+    assert asyncio.run(read_capped(_FakeResponse(b"<p>hi</p>", content_type=None))) == "<p>hi</p>"
+
+
+def test_read_capped_truncates_body():
+    # Reading stops at max_bytes
+    response = _FakeResponse(b"a" * 200_000)
+    assert asyncio.run(read_capped(response, max_bytes=100_000)) == "a" * 100_000
+
+
+async def _value(value, delay):
+    await asyncio.sleep(delay)
+    return value
+
+
+def test_first_truthy_skips_empty_results():
+    # An empty result that finishes first doesn't end the race
+    result = asyncio.run(WebScraper._first_truthy([_value("", 0.01), _value("page", 0.05)]))
+    assert result == "page"
+
+
+def test_first_truthy_staggers_later_coroutines():
+    # A fast nonempty first result means the staggered second coroutine is never started
+    started = []
+
+    async def tracked(value, delay):
+        started.append(value)
+        return await _value(value, delay)
+
+    result = asyncio.run(WebScraper._first_truthy([tracked("fast", 0.01), tracked("slow", 0.01)], stagger=1))
+    assert result == "fast"
+    assert started == ["fast"]
+
+
+
+class _FakeSession:
+    def __init__(self, responses, head_responses=()):
+        self.responses = responses
+        self.head_responses = list(head_responses)
+        self.calls = 0
+        self.request_headers = []  # headers of each GET, in order
+
+    def get(self, *args, headers=None, **kwargs):
+        self.calls += 1
+        self.request_headers.append(headers or {})
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    def head(self, *args, **kwargs):
+        return self.head_responses.pop(0)
+
+
+def test_splash_circuit_breaker_opens_and_resets(monkeypatch):
+    # Consecutive connection errors open the breaker; a response in between resets the count
+    monkeypatch.setattr("app.scraper.SPLASH_MAX_FAILURES", 2)
+    scraper = WebScraper()
+    session = _FakeSession([aiohttp.ClientConnectionError(), _FakeResponse(b"<p>ok</p>"),
+                            aiohttp.ClientConnectionError(), aiohttp.ClientConnectionError()])
+    scraper._get_session = lambda: session
+
+    async def run():
+        assert await scraper.get_html_using_splash("http://example.com") == ""
+        assert await scraper.get_html_using_splash("http://example.com") == "<p>ok</p>"
+        assert scraper._splash_failures == 0
+        await scraper.get_html_using_splash("http://example.com")
+        await scraper.get_html_using_splash("http://example.com")
+        # Open: Splash is not contacted at all
+        assert await scraper.get_html_using_splash("http://example.com") == ""
+        assert session.calls == 4
+
+    asyncio.run(run())
+
+
+
+class _FakeBrowser:
+    def __init__(self, connected=True):
+        self.connected = connected
+
+    def is_connected(self):
+        return self.connected
+
+
+def test_disconnected_browser_is_relaunched(monkeypatch):
+    # A crashed browser is replaced by a fresh launch instead of being handed out again
+    relaunched = _FakeBrowser()
+
+    class FakePlaywright:
+        class chromium:
+            @staticmethod
+            async def launch(headless=True):
+                return relaunched
+
+        async def start(self):
+            return self
+
+        async def stop(self):
+            pass
+
+    monkeypatch.setattr("app.scraper.async_playwright", FakePlaywright)
+    scraper = WebScraper(browser=_FakeBrowser(connected=False))
+    assert asyncio.run(scraper._ensure_browser()) is relaunched
+    assert scraper._owns_browser
+
+
+def _validated_scraper(responses, head_responses=()):
+    # WebScraper over a _FakeSession whose first GET stores validators for the page
+    scraper = WebScraper()
+    first = _FakeResponse(b"<p>old</p>", headers={"ETag": '"v1"', "Last-Modified": "Mon, 01 Jun 2026 00:00:00 GMT"})
+    session = _FakeSession([first] + responses, head_responses)
+    scraper._get_session = lambda: session
+
+    async def no_splash(url):
+        return ""
+
+    scraper.get_html_using_splash = no_splash
+    return scraper, session
+
+
+def test_not_modified_returns_stored_html():
+    # A revalidated page answers 304 and the HTML from the first download is returned
+    scraper, session = _validated_scraper([_FakeResponse(b"", status=304)])
+
+    async def run():
+        assert await scraper.fallback_get_html("http://example.com/") == "<p>old</p>"
+        assert await scraper.fallback_get_html("http://example.com/") == "<p>old</p>"
+        assert session.request_headers[1]["If-None-Match"] == '"v1"'
+
+    asyncio.run(run())
+
+
+def test_head_with_same_last_modified_skips_get():
+    # An unchanged Last-Modified on HEAD serves the stored HTML without a GET
+    head = _FakeResponse(b"", headers={"ETag": '"v1"', "Last-Modified": "Mon, 01 Jun 2026 00:00:00 GMT"})
+    scraper, session = _validated_scraper([], [head])
+
+    async def run():
+        await scraper.get_html("http://example.com/")
+        assert await scraper.get_html("http://example.com/") == "<p>old</p>"
+        assert session.calls == 1
+
+    asyncio.run(run())
+
+
+def test_head_with_changed_etag_forces_get():
+    # A new ETag means the page changed, even if Last-Modified did not
+    head = _FakeResponse(b"", headers={"ETag": '"v2"', "Last-Modified": "Mon, 01 Jun 2026 00:00:00 GMT"})
+    scraper, session = _validated_scraper([_FakeResponse(b"<p>new</p>")], [head])
+
+    async def run():
+        await scraper.get_html("http://example.com/")
+        assert await scraper.get_html("http://example.com/") == "<p>new</p>"
+        assert session.calls == 2
+
+    asyncio.run(run())
+
+
+def test_select_images():
+    # Relative URLs are resolved; svg, logo/icon, inline and repeated sources are skipped; at most 5 kept
+    srcs = ["/a.png", "/LOGO.png", "b.svg", "data:image/png;base64,xx", "/a.png", None, "/icon.gif",
+            "/c.jpg", "/d.jpg", "/e.jpg", "/f.jpg", "/g.jpg"]
+    assert select_images(srcs, "http://example.com/page") == [
+        "http://example.com/a.png", "http://example.com/c.jpg", "http://example.com/d.jpg",
+        "http://example.com/e.jpg", "http://example.com/f.jpg",
+    ]
+
+
+def test_decode_html_charset_fallback():
+    # Declared charset wins, unknown names fall through to UTF-8, and non-UTF-8 bodies are detected
+    assert decode_html("café".encode("latin-1"), "latin-1") == "café"
+    assert decode_html("café".encode("utf-8"), "no-such-charset") == "café"
+    body = '<html><head><meta charset="windows-1252"></head><body>caf\xe9</body></html>'.encode("windows-1252")
+    assert "café" in decode_html(body)
+
+
+def test_decode_html_keeps_utf8_cut_mid_character():
+    # A body truncated inside a multibyte character still decodes as UTF-8, not as a legacy codepage
+    body = ('<html><head><meta charset="utf-8"></head><body>' + "Привет мир " * 1000).encode("utf-8")
+    text = decode_html(body[:-2])  # drops the last space and half of "р"
+    assert text.startswith('<html><head><meta charset="utf-8"></head><body>Привет мир')
+    assert "Ð" not in text